@@ -1,9 +1,9 @@
 
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime
-import re, os
+import re, os, threading, logging, json, tempfile
 
 app = FastAPI(title="AI Governance – MVP API", version="0.3.0")
 
@@ -14,18 +14,24 @@ def index():
         "version": "0.3.0",
         "docs": "/docs",
         "health": "/health",
-        "endpoints": ["/nlp/score-ckp", "/ml/talent-score", "/graph/summary", "/admin/upload-model"]
+        "endpoints": ["/nlp/score-ckp", "/ml/talent-score", "/graph/summary", "/analytics/wqi-rollup", "/admin/upload-model"]
     }
 
 @app.get("/nlp/score-ckp")
 def score_ckp_help():
-    return {"usage": "Use POST with a JSON array of CKP items: [{entry_id, uraian_teks, target, realisasi}]"}
+    return {"usage": "Use POST with a JSON array of CKP items: [{entry_id, uraian_teks, target, realisasi, pegawai_id, unit, tanggal}]"}
 
 class CKPItem(BaseModel):
     entry_id: str
     uraian_teks: str
     target: Optional[float] = None
     realisasi: Optional[float] = None
+    # opsional: bila ada, skor dimasukkan ke rollup /analytics/wqi-rollup.
+    # Identitas rollup = (entry_id, pegawai_id): entry_id harus unik per pegawai lintas semua unggahan,
+    # karena skor ulang pasangan yang sama menggantikan kontribusi sebelumnya.
+    pegawai_id: Optional[str] = None
+    unit: Optional[str] = None
+    tanggal: Optional[str] = None
 
 class ScoreResponse(BaseModel):
     entry_id: str
@@ -85,13 +91,187 @@ def score_with_model(text: str, target=None, realisasi=None):
     rel = clamp(rel); dmp = clamp(dmp); bkt = clamp(bkt); jls = clamp(jls); kpt = clamp(kpt)
     return rel, dmp, bkt, jls, kpt, wqi
 
+# ===== WQI rollup cube (incremental) =====
+ROLLUP_GRAINS = ("day", "week", "month")
+ROLLUP_ALL = "*"
+ROLLUP_METRICS = ("wqi", "relevance", "impact", "evidence", "clarity", "compliance")
+
+# (grain, unit, pegawai_id) -> {period -> {metric -> agg}}; unit/pegawai_id "*" = semua
+_rollup: Dict[tuple, Dict[str, dict]] = {}
+# (entry_id, pegawai_id) -> kontribusi terakhir (periods, unit, pegawai_id, scores)
+_rollup_entries: Dict[tuple, dict] = {}
+# (entry_id, pegawai_id) yang di-skor dengan tanggal tidak valid (bukan YYYY-MM-DD) sehingga tidak masuk rollup
+_rollup_skipped = set()
+_rollup_lock = threading.Lock()
+_log = logging.getLogger("wqi_rollup")
+_TANGGAL_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+def _period_keys(tanggal: str):
+    """Kunci day/week/month dari `tanggal`; harus persis YYYY-MM-DD (spasi di tepi diabaikan)."""
+    t = tanggal.strip()
+    if not _TANGGAL_RE.fullmatch(t):
+        raise ValueError(f"tanggal bukan YYYY-MM-DD: {tanggal!r}")
+    d = datetime.strptime(t, "%Y-%m-%d").date()
+    y, w, _ = d.isocalendar()
+    return {"day": d.isoformat(), "week": f"{y}-W{w:02d}", "month": d.strftime("%Y-%m")}
+
+def _hist_bin(metric: str, v: int) -> str:
+    if metric == "wqi":
+        # bin 10-an: "0","10",...,"90" ("90" memuat 100)
+        return str(min(9, max(0, v // 10)) * 10)
+    return str(v)
+
+def _rollup_apply(contrib: dict, sign: int):
+    """Tambah (sign=+1) atau tarik kembali (sign=-1) kontribusi satu entri di semua sel terkait."""
+    units = (contrib["unit"], ROLLUP_ALL) if contrib["unit"] else (ROLLUP_ALL,)
+    pegs = (contrib["pegawai_id"], ROLLUP_ALL) if contrib["pegawai_id"] else (ROLLUP_ALL,)
+    vals = [(m, int(contrib["scores"][m]), _hist_bin(m, int(contrib["scores"][m]))) for m in ROLLUP_METRICS]
+    for grain in ROLLUP_GRAINS:
+        period = contrib["periods"][grain]
+        for u in units:
+            for p in pegs:
+                series = _rollup.setdefault((grain, u, p), {})
+                cell = series.setdefault(period, {})
+                for m, v, b in vals:
+                    agg = cell.get(m)
+                    if agg is None:
+                        agg = cell[m] = {"sum": 0, "count": 0, "histogram": {}, "values": {}}
+                    agg["sum"] += sign * v
+                    agg["count"] += sign
+                    # histogram (bin) untuk tampilan; values (nilai persis) untuk min/max setelah retraksi
+                    for bucket, key in ((agg["histogram"], b), (agg["values"], v)):
+                        n = bucket.get(key, 0) + sign
+                        if n > 0:
+                            bucket[key] = n
+                        else:
+                            bucket.pop(key, None)
+                if cell[ROLLUP_METRICS[0]]["count"] <= 0:
+                    del series[period]
+                    if not series:
+                        del _rollup[(grain, u, p)]
+
+def rollup_record(it: CKPItem, scores: Dict[str, int]) -> Optional[dict]:
+    """Bentuk catatan rollup untuk satu entri ter-skor; diterapkan lewat rollup_commit.
+
+    Entri tanpa `tanggal` tidak ikut rollup (None); `tanggal` yang tidak valid dicatat sebagai skip.
+    """
+    if it.tanggal is None or not it.tanggal.strip():
+        return None
+    try:
+        periods = _period_keys(it.tanggal)
+    except ValueError:
+        _log.warning("entry %s tidak masuk rollup WQI: tanggal %r bukan YYYY-MM-DD", it.entry_id, it.tanggal)
+        return {"entry_id": it.entry_id, "pegawai_id": it.pegawai_id, "skip": True}
+    return {"entry_id": it.entry_id, "pegawai_id": it.pegawai_id, "contrib": {
+        "periods": periods, "unit": it.unit, "pegawai_id": it.pegawai_id,
+        "scores": {m: int(scores[m]) for m in ROLLUP_METRICS}}}
+
+def _rollup_replay(rec: dict):
+    """Terapkan satu catatan ke state di memori; skor ulang (entry_id, pegawai_id) yang sama menggantikan kontribusi sebelumnya."""
+    key = (rec["entry_id"], rec.get("pegawai_id"))
+    old = _rollup_entries.pop(key, None)
+    if old is not None:
+        _rollup_apply(old, -1)
+    if rec.get("skip"):
+        _rollup_skipped.add(key)
+    else:
+        _rollup_apply(rec["contrib"], +1)
+        _rollup_entries[key] = rec["contrib"]
+        _rollup_skipped.discard(key)
+
+def rollup_commit(records: List[dict]):
+    """Terapkan catatan ke cube dan tambahkan ke log (O(jumlah catatan), bukan O(riwayat))."""
+    if not records:
+        return
+    lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    with _rollup_lock:
+        for r in records:
+            _rollup_replay(r)
+        try:
+            with open(_rollup_log_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError:
+            _log.warning("gagal menulis log rollup WQI ke %s", _rollup_log_path)
+
+def _rollup_load():
+    """Putar ulang log saat startup lalu padatkan jadi satu baris per entri."""
+    with open(_rollup_log_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                _rollup_replay(json.loads(line))
+    compact = [{"entry_id": e, "pegawai_id": p, "contrib": c} for (e, p), c in _rollup_entries.items()]
+    compact += [{"entry_id": e, "pegawai_id": p, "skip": True} for e, p in _rollup_skipped]
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(_rollup_log_path), delete=False) as f:
+        f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in compact)
+    os.replace(f.name, _rollup_log_path)
+
+# Log append-only kontribusi per entri (JSON lines), diputar ulang saat startup
+_rollup_log_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "models", "wqi_rollup.jsonl"))
+try:
+    if os.path.exists(_rollup_log_path):
+        _rollup_load()
+except Exception:
+    _log.warning("gagal memuat %s; rollup WQI dimulai kosong", _rollup_log_path)
+    _rollup.clear(); _rollup_entries.clear(); _rollup_skipped.clear()
+
+class RollupMetric(BaseModel):
+    sum: int
+    count: int
+    min: int
+    max: int
+    mean: float
+    histogram: Dict[str, int] = {}
+
+class RollupCell(BaseModel):
+    period: str
+    metrics: Dict[str, RollupMetric]
+
+class RollupResponse(BaseModel):
+    grain: str
+    unit: str
+    pegawai_id: str
+    cells: List[RollupCell]
+
+def _cell_out(period: str, cell: dict) -> RollupCell:
+    return RollupCell(period=period, metrics={
+        m: RollupMetric(sum=a["sum"], count=a["count"], min=min(a["values"]), max=max(a["values"]),
+                        mean=round(a["sum"] / a["count"], 2), histogram=dict(a["histogram"]))
+        for m, a in cell.items()
+    })
+
+@app.get("/analytics/wqi-rollup", response_model=RollupResponse)
+def wqi_rollup(grain: str = "month", unit: str = ROLLUP_ALL, pegawai_id: str = ROLLUP_ALL, period: Optional[str] = None):
+    """Baca rollup WQI; dengan `period` lookup satu sel, tanpa `period` seluruh deret waktu."""
+    if grain not in ROLLUP_GRAINS:
+        raise HTTPException(status_code=400, detail=f"grain harus salah satu dari {list(ROLLUP_GRAINS)}")
+    with _rollup_lock:
+        series = _rollup.get((grain, unit, pegawai_id), {})
+        if period is not None:
+            cells = [_cell_out(period, series[period])] if period in series else []
+        else:
+            cells = [_cell_out(k, series[k]) for k in sorted(series)]
+    return RollupResponse(grain=grain, unit=unit, pegawai_id=pegawai_id, cells=cells)
+
+@app.get("/analytics/wqi-rollup/dimensions")
+def wqi_rollup_dimensions():
+    """Daftar unit & pegawai_id yang sudah masuk rollup (untuk filter dashboard)."""
+    with _rollup_lock:
+        keys = [k for k in _rollup if k[0] == "month"]
+        return {
+            "grains": list(ROLLUP_GRAINS),
+            "units": sorted({u for _, u, _ in keys if u != ROLLUP_ALL}),
+            "pegawai_ids": sorted({p for _, _, p in keys if p != ROLLUP_ALL}),
+            "entries": len(_rollup_entries),
+            "skipped": len(_rollup_skipped),
+        }
+
 @app.get("/health")
 def health():
     return {"status":"ok","time": datetime.utcnow().isoformat(), "nlp_model_loaded": _model_bundle is not None, "talent_model_loaded": _talent_model_bundle is not None}
 
 @app.post("/nlp/score-ckp", response_model=List[ScoreResponse])
 def score_ckp(items: List[CKPItem]):
-    results = []
+    results, records = [], []
     for it in items:
         rel,dmp,bkt,jls,kpt,wqi = score_with_model(it.uraian_teks, it.target, it.realisasi)
         results.append(ScoreResponse(
@@ -104,6 +284,10 @@ def score_ckp(items: List[CKPItem]):
             compliance=kpt,
             wqi=wqi
         ))
+        rec = rollup_record(it, {"wqi": wqi, "relevance": rel, "impact": dmp, "evidence": bkt, "clarity": jls, "compliance": kpt})
+        if rec is not None:
+            records.append(rec)
+    rollup_commit(records)
     return results
 
 @app.post("/admin/upload-model")
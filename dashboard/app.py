@@ -54,7 +54,7 @@ def show_model_status(backend_base: str):
 st.sidebar.title("Menu")
 page = st.sidebar.selectbox(
     "Pilih Halaman",
-    ["Skor CKP", "Talent Map", "Collaboration Graph", "Model Loader", "Talent Model Loader"]
+    ["Skor CKP", "Rollup WQI", "Talent Map", "Collaboration Graph", "Model Loader", "Talent Model Loader"]
 )
 
 # ============ 1) Skor CKP ============
@@ -97,6 +97,10 @@ if page == "Skor CKP":
                     item["realisasi"] = float(val)
                 except Exception:
                     item["realisasi"] = None
+            # kunci rollup opsional (unit/pegawai/tanggal) agar backend memperbarui /analytics/wqi-rollup
+            for k in ("pegawai_id", "unit", "tanggal"):
+                if k in df.columns and pd.notna(getattr(r, k)):
+                    item[k] = str(getattr(r, k))
             payload.append(item)
 
         if st.button("Skor via API"):
@@ -111,6 +115,53 @@ if page == "Skor CKP":
             except Exception as e:
                 st.error(f"Gagal memanggil API: {e}")
 
+# ============ 1b) Rollup WQI ============
+if page == "Rollup WQI":
+    st.header("Rollup WQI per Unit / Pegawai / Periode")
+    api_base = st.text_input("Base URL Backend", value="http://127.0.0.1:8000", key="rollup_api_base")
+    show_model_status(api_base)
+    st.caption("Data berasal dari rollup backend yang diperbarui setiap kali CKP (dengan kolom unit, pegawai_id, tanggal) di-skor.")
+
+    try:
+        dims = requests.get(api_base.rstrip("/") + "/analytics/wqi-rollup/dimensions", timeout=10).json()
+    except Exception as e:
+        st.error(f"Gagal mengambil dimensi rollup: {e}")
+        st.stop()
+    if dims.get("skipped"):
+        st.warning(f"{dims['skipped']} baris ter-skor tidak masuk rollup karena kolom tanggal bukan format YYYY-MM-DD.")
+    if not dims.get("entries"):
+        st.info("Rollup masih kosong. Skor CKP terlebih dahulu di halaman 'Skor CKP'.")
+        st.stop()
+
+    c1, c2, c3 = st.columns(3)
+    grain = c1.selectbox("Periode", options=dims["grains"], index=dims["grains"].index("month"))
+    unit = c2.selectbox("Unit", options=["*"] + dims["units"], format_func=lambda u: "Semua unit" if u == "*" else u)
+    peg = c3.selectbox("Pegawai", options=["*"] + dims["pegawai_ids"], format_func=lambda p: "Semua pegawai" if p == "*" else p)
+    metric = st.selectbox("Metrik", options=["wqi", "relevance", "impact", "evidence", "clarity", "compliance"])
+
+    try:
+        res = requests.get(api_base.rstrip("/") + "/analytics/wqi-rollup",
+                           params={"grain": grain, "unit": unit, "pegawai_id": peg}, timeout=10)
+        res.raise_for_status()
+        cells = res.json()["cells"]
+    except Exception as e:
+        st.error(f"Gagal memanggil API rollup: {e}")
+        st.stop()
+    if not cells:
+        st.info("Tidak ada data untuk kombinasi filter ini.")
+        st.stop()
+
+    rdf = pd.DataFrame([{"period": c["period"], **{k: v for k, v in c["metrics"][metric].items() if k != "histogram"}}
+                        for c in cells]).set_index("period")
+    st.subheader(f"Rata-rata {metric} per {grain}")
+    st.line_chart(rdf["mean"])
+    st.dataframe(rdf)
+
+    sel = st.selectbox("Distribusi untuk periode", options=list(rdf.index), index=len(rdf) - 1)
+    hist = next(c for c in cells if c["period"] == sel)["metrics"][metric]["histogram"]
+    hist_s = pd.Series(hist).sort_index(key=lambda ix: ix.astype(int))
+    st.bar_chart(hist_s)
+
 # ============ 2) Talent Map ============
 if page == "Talent Map":
     st.header("Talent Map – Matplotlib dengan Filter")
@@ -316,4 +367,4 @@ if page == "Talent Model Loader":
 
 # Footer
 st.markdown("---")
-st.caption("MVP Dashboard – Skor CKP • Talent Map • Collaboration Graph • Model Loader • Talent Model Loader")
+st.caption("MVP Dashboard – Skor CKP • Rollup WQI • Talent Map • Collaboration Graph • Model Loader • Talent Model Loader")